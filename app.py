@@ -1,25 +1,36 @@
 import os
+import io
+import hashlib
 import shutil
 import tempfile
+import time
 import zipfile
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, request, send_file, jsonify, render_template, redirect, url_for, flash
 from werkzeug.utils import secure_filename
 import tabula
-import pandas as pd
-from PyPDF2 import PdfReader
+import xlsxwriter
 from extract_pdf import extract_text_from_pdf as extract_text_impl
 from extract_pdf import extract_tables_from_pdf as extract_tables_impl
 from extract_pdf import process_table_with_newlines as process_table_impl
-from extract_pdf import convert_to_numeric
+from extract_pdf import extract_content_pymupdf, prepare_tables, _code_version
+from extract_pdf import write_excel_sheet, write_text_sheet, write_csv_files, EXCEL_HEADER_FORMAT
+
+MAX_UPLOAD_BYTES = 16 * 1024 * 1024  # 16MB max file size
+# Read uploads in 1MB blocks when hashing and saving them
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 app = Flask(__name__)
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
 app.config['UPLOAD_EXTENSIONS'] = ['.pdf']
 app.config['SECRET_KEY'] = 'your-secret-key-here'  # For flash messages
+app.config['CACHE_DIR'] = os.path.join(app.root_path, 'cache')
+app.config['CACHE_MAX_BYTES'] = 512 * 1024 * 1024  # 512MB of cached ZIP files
+# 'tabula' (hybrid stream/lattice selection) or 'pymupdf' (single in-process pass, no JVM)
+app.config['EXTRACTION_ENGINE'] = 'tabula'
 
 def extract_text_from_pdf(pdf_path):
-    """Extract text from PDF using PyPDF2"""
+    """Extract text from PDF using PyMuPDF (PyPDF2 fallback)"""
     return extract_text_impl(pdf_path)
 
 def extract_tables_from_pdf(pdf_path, use_hybrid=True):
@@ -30,33 +41,36 @@ def process_table_with_newlines(df):
     """Process table to handle cells with newline-separated data"""
     return process_table_impl(df)
 
+def extract_content(pdf_path):
+    """Extract text and tables concurrently, returning (text, tables)"""
+    if app.config['EXTRACTION_ENGINE'] == 'pymupdf':
+        return extract_content_pymupdf(pdf_path)
+    
+    # tabula runs in the JVM and PyMuPDF in C, so the two passes overlap well in threads
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        text_future = executor.submit(extract_text_from_pdf, pdf_path)
+        tables_future = executor.submit(extract_tables_from_pdf, pdf_path, use_hybrid=True)
+        return text_future.result(), tables_future.result()
+
 def save_to_excel(tables, text, base_filename, output_dir):
-    """Save extracted tables and text to Excel file"""
+    """Save numeric-converted tables and text to Excel file"""
     excel_filename = os.path.join(output_dir, f"{base_filename}_extracted.xlsx")
     
-    with pd.ExcelWriter(excel_filename, engine='openpyxl') as writer:
-        for i, df in enumerate(tables):
-            processed_df = process_table_with_newlines(df)
-            # Convert numeric strings to actual numbers
-            processed_df = convert_to_numeric(processed_df)
+    with xlsxwriter.Workbook(excel_filename, {'constant_memory': True, 'strings_to_urls': False}) as workbook:
+        header_format = workbook.add_format(EXCEL_HEADER_FORMAT)
+        for i, numeric_df in enumerate(tables):
             sheet_name = f'Table_{i+1}'
-            processed_df.to_excel(writer, sheet_name=sheet_name, index=False)
+            write_excel_sheet(workbook, sheet_name, numeric_df, header_format)
         
         if text:
-            text_df = pd.DataFrame({'Text Content': [text]})
-            text_df.to_excel(writer, sheet_name='Text_Content', index=False)
+            write_text_sheet(workbook, text, header_format)
     
     return excel_filename
 
 def save_to_csv(tables, text, base_filename, output_dir):
-    """Save extracted tables to CSV files"""
-    csv_files = []
-    
-    for i, df in enumerate(tables):
-        processed_df = process_table_with_newlines(df)
-        csv_filename = os.path.join(output_dir, f"{base_filename}_table_{i+1}.csv")
-        processed_df.to_csv(csv_filename, index=False, encoding='utf-8-sig')
-        csv_files.append(csv_filename)
+    """Save processed tables to CSV files"""
+    csv_files = [os.path.join(output_dir, f"{base_filename}_table_{i+1}.csv") for i in range(len(tables))]
+    write_csv_files(tables, csv_files)
     
     if text:
         text_filename = os.path.join(output_dir, f"{base_filename}_text.txt")
@@ -66,13 +80,153 @@ def save_to_csv(tables, text, base_filename, output_dir):
     
     return csv_files
 
-def create_zip(files, zip_path):
-    """Create a ZIP file containing all the output files"""
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+def create_zip(files):
+    """Create an in-memory ZIP file containing all the output files"""
+    zip_buffer = io.BytesIO()
+    # Level 1 is much faster than the default and XLSX/CSV gain little from more
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
         for file_path in files:
             if os.path.exists(file_path):
                 arcname = os.path.basename(file_path)
                 zipf.write(file_path, arcname)
+    zip_buffer.seek(0)
+    return zip_buffer
+
+def compute_cache_key(file, filename):
+    """Hash the uploaded PDF content and filename to key the result cache"""
+    hasher = hashlib.sha256()
+    for chunk in iter(lambda: file.stream.read(UPLOAD_CHUNK_SIZE), b''):
+        hasher.update(chunk)
+    file.stream.seek(0)
+    # Output file names inside the ZIP depend on the uploaded filename,
+    # and the tables themselves on the extraction engine and its code
+    hasher.update(filename.encode('utf-8'))
+    hasher.update(app.config['EXTRACTION_ENGINE'].encode('utf-8'))
+    hasher.update(_code_version().encode('utf-8'))
+    return hasher.hexdigest()
+
+def get_cached_zip(cache_key):
+    """Return the cached ZIP opened for reading, or None on a miss"""
+    cached_path = os.path.join(app.config['CACHE_DIR'], f"{cache_key}.zip")
+    try:
+        # An open file stays readable even if another thread evicts it meanwhile
+        cached_file = open(cached_path, 'rb')
+    except FileNotFoundError:
+        return None
+    try:
+        # Touch the file so eviction treats it as recently used
+        os.utime(cached_path)
+    except OSError:
+        pass
+    return cached_file
+
+def store_cached_zip(zip_buffer, cache_key):
+    """Write a generated ZIP into the cache and evict least recently used entries"""
+    # Caching is best effort: a failure here must not fail the request
+    try:
+        _write_cached_zip(zip_buffer, cache_key)
+        _evict_cached_zips()
+    except OSError as e:
+        app.logger.warning(f"Could not update the ZIP cache: {e}")
+
+def _write_cached_zip(zip_buffer, cache_key):
+    """Atomically write a ZIP into the cache so concurrent readers never see a partial file"""
+    cache_dir = app.config['CACHE_DIR']
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(zip_buffer.getbuffer())
+        os.replace(tmp_path, os.path.join(cache_dir, f"{cache_key}.zip"))
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def _evict_cached_zips():
+    """Remove least recently used cached ZIPs until the cache fits CACHE_MAX_BYTES"""
+    cache_dir = app.config['CACHE_DIR']
+    entries = []
+    for name in os.listdir(cache_dir):
+        # Skip other threads' in-progress writes
+        if not name.endswith('.zip'):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            # Evicted by another thread in the meantime
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= app.config['CACHE_MAX_BYTES']:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
+
+def process_upload(file):
+    """Extract an uploaded PDF into a ZIP, returning (ZIP file or buffer, download name) or None if nothing was extracted"""
+    filename = secure_filename(file.filename)
+    base_filename = os.path.splitext(filename)[0]
+    zip_filename = f"{base_filename}_extracted_{time.strftime('%Y%m%d_%H%M%S')}.zip"
+    
+    # Serve repeated uploads of the same PDF from the cache
+    cache_key = compute_cache_key(file, filename)
+    cached_zip = get_cached_zip(cache_key)
+    if cached_zip:
+        return cached_zip, zip_filename
+    
+    # Create temporary directory for processing
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Save uploaded file
+        pdf_path = os.path.join(temp_dir, filename)
+        with open(pdf_path, 'wb') as f:
+            shutil.copyfileobj(file.stream, f, UPLOAD_CHUNK_SIZE)
+        
+        # Extract text and tables (using hybrid mode by default)
+        text, tables = extract_content(pdf_path)
+        
+        if not tables and not text:
+            return None
+        
+        output_files = []
+        
+        # Save to Excel
+        if tables:
+            # Process tables once and share the results between both writers; serially,
+            # since a process pool per request would multiply across gunicorn threads
+            processed_tables, numeric_tables = prepare_tables(tables, parallel=False)
+            excel_file = save_to_excel(numeric_tables, text or "", base_filename, temp_dir)
+            output_files.append(excel_file)
+            
+            # Save to CSV
+            csv_files = save_to_csv(processed_tables, text or "", base_filename, temp_dir)
+            output_files.extend(csv_files)
+        elif text:
+            # Save text only
+            text_filename = os.path.join(temp_dir, f"{base_filename}_text.txt")
+            with open(text_filename, 'w', encoding='utf-8') as f:
+                f.write(text)
+            output_files.append(text_filename)
+        
+        # Create ZIP file
+        zip_buffer = create_zip(output_files)
+        store_cached_zip(zip_buffer, cache_key)
+    
+    return zip_buffer, zip_filename
+
+def send_zip(zip_file, zip_filename):
+    """Send a ZIP file (open file or buffer) as a download"""
+    return send_file(
+        zip_file,
+        mimetype='application/zip',
+        as_attachment=True,
+        download_name=zip_filename
+    )
 
 @app.route('/', methods=['GET'])
 def index():
@@ -93,51 +247,12 @@ def extract_pdf():
         return jsonify({"error": "Invalid file format. Only PDF files are allowed"}), 400
     
     try:
-        # Create temporary directory for processing
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Save uploaded file
-            filename = secure_filename(file.filename)
-            base_filename = os.path.splitext(filename)[0]
-            pdf_path = os.path.join(temp_dir, filename)
-            file.save(pdf_path)
-            
-            # Extract text and tables (using hybrid mode by default)
-            text = extract_text_from_pdf(pdf_path)
-            tables = extract_tables_from_pdf(pdf_path, use_hybrid=True)
-            
-            if not tables and not text:
-                return jsonify({"error": "No content could be extracted from the PDF"}), 422
-            
-            output_files = []
-            
-            # Save to Excel
-            if tables:
-                excel_file = save_to_excel(tables, text or "", base_filename, temp_dir)
-                output_files.append(excel_file)
-                
-                # Save to CSV
-                csv_files = save_to_csv(tables, text or "", base_filename, temp_dir)
-                output_files.extend(csv_files)
-            elif text:
-                # Save text only
-                text_filename = os.path.join(temp_dir, f"{base_filename}_text.txt")
-                with open(text_filename, 'w', encoding='utf-8') as f:
-                    f.write(text)
-                output_files.append(text_filename)
-            
-            # Create ZIP file
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            zip_filename = f"{base_filename}_extracted_{timestamp}.zip"
-            zip_path = os.path.join(temp_dir, zip_filename)
-            create_zip(output_files, zip_path)
-            
-            # Send ZIP file
-            return send_file(
-                zip_path,
-                mimetype='application/zip',
-                as_attachment=True,
-                download_name=zip_filename
-            )
+        result = process_upload(file)
+        if result is None:
+            return jsonify({"error": "No content could be extracted from the PDF"}), 422
+        
+        # Send ZIP file
+        return send_zip(*result)
             
     except Exception as e:
         return jsonify({"error": f"Processing failed: {str(e)}"}), 500
@@ -159,52 +274,13 @@ def upload_file():
         return redirect(url_for('index'))
     
     try:
-        # Create temporary directory for processing
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Save uploaded file
-            filename = secure_filename(file.filename)
-            base_filename = os.path.splitext(filename)[0]
-            pdf_path = os.path.join(temp_dir, filename)
-            file.save(pdf_path)
-            
-            # Extract text and tables (using hybrid mode by default)
-            text = extract_text_from_pdf(pdf_path)
-            tables = extract_tables_from_pdf(pdf_path, use_hybrid=True)
-            
-            if not tables and not text:
-                flash('PDFからデータを抽出できませんでした')
-                return redirect(url_for('index'))
-            
-            output_files = []
-            
-            # Save to Excel
-            if tables:
-                excel_file = save_to_excel(tables, text or "", base_filename, temp_dir)
-                output_files.append(excel_file)
-                
-                # Save to CSV
-                csv_files = save_to_csv(tables, text or "", base_filename, temp_dir)
-                output_files.extend(csv_files)
-            elif text:
-                # Save text only
-                text_filename = os.path.join(temp_dir, f"{base_filename}_text.txt")
-                with open(text_filename, 'w', encoding='utf-8') as f:
-                    f.write(text)
-                output_files.append(text_filename)
-            
-            # Create ZIP file
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            zip_filename = f"{base_filename}_extracted_{timestamp}.zip"
-            zip_path = os.path.join(temp_dir, zip_filename)
-            create_zip(output_files, zip_path)
-            
-            # Send ZIP file
-            return send_file(
-                zip_path,
-                mimetype='application/zip',
-                as_attachment=True,
-                download_name=zip_filename
-            )
+        result = process_upload(file)
+        if result is None:
+            flash('PDFからデータを抽出できませんでした')
+            return redirect(url_for('index'))
+        
+        # Send ZIP file
+        return send_zip(*result)
             
     except Exception as e:
         flash(f'処理中にエラーが発生しました: {str(e)}')
@@ -1,46 +1,202 @@
 import os
+import re
+import io
+import codecs
+import json
+import math
+import multiprocessing
+import shutil
+import hashlib
+import pickle
+import sys
+import tempfile
+import threading
 import tabula
+from tabula.io import _extract_from as _tabula_dataframes_from_json
+import jpype
 import pandas as pd
 import numpy as np
 import pdfplumber
+try:
+    # Rust reimplementation of pdfplumber, tried first for line detection when installed
+    import pdfplumber_rs
+except ImportError:
+    pdfplumber_rs = None
+import fitz
+import xlsxwriter
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 from PyPDF2 import PdfReader
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import redirect_stdout
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Optional, Tuple, Dict
 
+# Same look as the header row pandas' to_excel produces
+EXCEL_HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+# Excel cells hold at most 32767 characters
+EXCEL_TEXT_CHUNK_SIZE = 32000
+# Below this many cells in total the spawn pool startup (interpreter plus pandas
+# import per worker) costs more than the table preparation it spreads out
+PARALLEL_TABLES_MIN_CELLS = 500_000
+# Upper bound on PDFs processed at once by main(); each worker runs its own JVM
+MAX_FILE_WORKERS = 4
+# Upper bound on CSV files written at once
+CSV_WRITE_WORKERS = 8
+
+# Hybrid extraction keeps the initial mode without trying the alternative
+# when its score reaches this (e.g. a clean 10x5 table scores ~7)
+CONFIDENCE_THRESHOLD = 5.0
+
+# Lines within this many degrees of vertical count as vertical ruling lines
+VERTICAL_ANGLE_TOL_DEG = 2.0
+_LINE_DTYPE = np.dtype([('page', 'i8'), ('x0', 'f8'), ('y0', 'f8'), ('x1', 'f8'), ('y1', 'f8')])
+
+# Per-page line detection and tabula results are cached here, keyed by PDF content hash
+EXTRACTION_CACHE_DIR = os.path.join('.cache', 'pdf_extract')
+# Final hybrid extraction results, one directory of Parquet files per PDF
+TABLE_CACHE_DIR = os.path.join('.cache', 'pdf-text')
+
+# Cell part classification: NUM is str.isdigit() once ',', '.' and '-' are removed
+_NUM_SEPARATORS_RE = re.compile(r'[,.\-]')
+
+# String forms of missing cells that are blanked out during clean-up
+_NAN_SENTINELS = ['nan', 'NaN', 'None']
+
+@lru_cache(maxsize=None)
+def _has_digit_re() -> re.Pattern:
+    """Regex matching any character str.isdigit() accepts, built on first use"""
+    # str.isdigit() also accepts digits outside Unicode Nd that \d misses, such as '①' and '²';
+    # finding them scans every code point, so it is deferred from import (and spawn) time
+    non_decimal_digits = ''.join(ch for ch in map(chr, range(sys.maxunicode + 1))
+                                 if ch.isdigit() and not ch.isdecimal())
+    return re.compile(f"[\\d{re.escape(non_decimal_digits)}]")
+
+def _classify_parts(parts):
+    """Classify each space-separated cell part as NUM, PCT, MIXED or TEXT (None where missing)"""
+    conditions = [
+        parts.str.replace(_NUM_SEPARATORS_RE, '', regex=True).str.isdigit().eq(True),
+        parts.str.contains('%', regex=False, na=False),
+        parts.str.contains(_has_digit_re(), na=False),
+    ]
+    labels = np.select(conditions, ['NUM', 'PCT', 'MIXED'], 'TEXT').astype(object)
+    labels[parts.isna().to_numpy()] = None
+    return pd.Series(labels, index=parts.index)
+
+def _cell_text(column):
+    """Stringify a column, with NaN for cells that are empty or missing"""
+    cells = column.astype(str)
+    return cells.where(~cells.isin(_NAN_SENTINELS + ['']))
+
+def _split_cells(cells, out):
+    """Split cell text on whitespace into the columns of `out`, padding with empty strings"""
+    width = out.shape[1]
+    if width <= 1:
+        out[:, 0] = cells.fillna('').to_numpy(dtype=object)
+        return
+    parts = cells.str.split(expand=True).reindex(columns=range(width))
+    out[:] = parts.fillna('').to_numpy(dtype=object)
+
+def _split_columns(column_cells, widths, n_rows):
+    """Split each column of cell text into `width` columns of one preallocated array"""
+    out = np.empty((n_rows, sum(widths)), dtype=object)
+    offset = 0
+    for cells, width in zip(column_cells, widths):
+        _split_cells(cells, out[:, offset:offset + width])
+        offset += width
+    return out
+
+def file_sha256(path):
+    """Return the SHA-256 hex digest of a file's content"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+@lru_cache(maxsize=None)
+def _code_version():
+    """Hash of this module's source, so cached results are only reused by the code that made them"""
+    return file_sha256(__file__)[:16]
+
+def _cache_path(key):
+    """Return the cache file path for a tuple key"""
+    digest = hashlib.sha256(repr((_code_version(), key)).encode('utf-8')).hexdigest()
+    return os.path.join(EXTRACTION_CACHE_DIR, f"{digest}.pkl")
+
+def _cache_load(key):
+    """Load a cached value, returning (hit, value)"""
+    path = _cache_path(key)
+    try:
+        with open(path, 'rb') as f:
+            return True, pickle.load(f)
+    except FileNotFoundError:
+        return False, None
+    except Exception as e:
+        # e.g. a pickle from another pandas version; drop it so it gets rebuilt
+        print(f"Error reading extraction cache, discarding entry: {e}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return False, None
+
+def _cache_store(key, value):
+    """Store a value in the cache, ignoring write failures"""
+    tmp_path = None
+    try:
+        os.makedirs(EXTRACTION_CACHE_DIR, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial pickle
+        fd, tmp_path = tempfile.mkstemp(dir=EXTRACTION_CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _cache_path(key))
+        tmp_path = None
+    except Exception as e:
+        print(f"Error writing extraction cache: {e}")
+    finally:
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
 def extract_text_from_pdf(pdf_path):
-    """Extract text from PDF using PyPDF2"""
+    """Extract text from PDF using PyMuPDF, falling back to PyPDF2"""
+    try:
+        with fitz.open(pdf_path) as doc:
+            parts = [f"\n--- Page {page_num + 1} ---\n{page.get_text()}" for page_num, page in enumerate(doc)]
+        return "".join(parts)
+    except Exception as e:
+        print(f"PyMuPDF text extraction failed, falling back to PyPDF2: {e}")
+    
     try:
         reader = PdfReader(pdf_path)
-        text = ""
+        parts = []
         
         for page_num, page in enumerate(reader.pages):
-            text += f"\n--- Page {page_num + 1} ---\n"
-            text += page.extract_text()
+            parts.append(f"\n--- Page {page_num + 1} ---\n")
+            parts.append(page.extract_text() or "")
         
-        return text
+        return "".join(parts)
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
         return None
 
-def detect_vertical_lines(pdf_path: str, page_num: int, angle_tol_deg: float = 2.0) -> int:
-    """Detect vertical lines in a PDF page using pdfplumber"""
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            if page_num <= 0 or page_num > len(pdf.pages):
-                return 0
-            page = pdf.pages[page_num - 1]
-            lines = page.lines or []
-            count = 0
-            for ln in lines:
-                dx = abs(ln["x1"] - ln["x0"])
-                dy = abs(ln["y1"] - ln["y0"])
-                # Count vertical or nearly vertical lines
-                if dy > 0 and dx / dy < np.tan(np.deg2rad(angle_tol_deg)):
-                    count += 1
-            return count
-    except Exception as e:
-        print(f"Error detecting vertical lines: {e}")
-        return 0
+@lru_cache(maxsize=None)
+def _tan_of(angle_deg: float) -> float:
+    """Tangent of an angle in degrees, computed once per angle"""
+    return math.tan(math.radians(angle_deg))
+
+def _vertical_mask(coords: np.ndarray, angle_tol_deg: float = VERTICAL_ANGLE_TOL_DEG) -> np.ndarray:
+    """Flag the vertical or nearly vertical lines in an array of line endpoints"""
+    dx = np.abs(coords['x1'] - coords['x0'])
+    dy = np.abs(coords['y1'] - coords['y0'])
+    # dx / dy < tan, without dividing by zero
+    return (dy > 0) & (dx < _tan_of(angle_tol_deg) * dy)
 
 def score_dataframe(df: pd.DataFrame) -> float:
     """Score extracted table quality (higher is better)"""
@@ -54,11 +210,16 @@ def score_dataframe(df: pd.DataFrame) -> float:
         return -0.5
     
     # NaN ratio (lower is better)
-    nan_ratio = df.isna().mean().mean()
+    values = df.to_numpy(dtype=object)
+    nan_ratio = float(pd.isna(values).mean())
     
     # Column quality metrics
-    dup_cols_penalty = len(df.columns) - len(set(map(str, df.columns)))
-    empty_cols = sum(df[col].astype(str).str.strip().eq("").mean() > 0.9 for col in df.columns)
+    dup_cols_penalty = int(df.columns.astype(str).duplicated().sum())
+    # Blank cells are empty or whitespace-only strings; checking them in place
+    # avoids stringifying every cell of the frame
+    blank = np.fromiter((isinstance(v, str) and not v.strip() for v in values.ravel()),
+                        dtype=bool, count=values.size).reshape(values.shape)
+    empty_cols = int((blank.mean(axis=0) > 0.9).sum())
     
     # Row count penalty for excessive rows (possible misextraction)
     size_penalty = 0.0
@@ -80,139 +241,363 @@ def score_tables(dfs: List[pd.DataFrame]) -> float:
     """Calculate average score for multiple tables"""
     if not dfs:
         return -1.0
-    return float(np.mean([score_dataframe(df) for df in dfs]))
+    scores = [score_dataframe(df) for df in dfs]
+    return float(sum(scores) / len(scores))
 
-def extract_tables_with_mode(pdf_path: str, pages: str = 'all', mode: str = 'stream', 
-                           guess: bool = True) -> List[pd.DataFrame]:
-    """Extract tables using specified mode (stream or lattice)"""
-    try:
-        kwargs = {'pages': pages, 'multiple_tables': True, 'guess': guess}
-        if mode == 'stream':
-            kwargs['stream'] = True
-        elif mode == 'lattice':
-            kwargs['lattice'] = True
+def _tabula_options(pages, mode: str = 'stream', guess: bool = True) -> dict:
+    """Build tabula.read_pdf keyword arguments for the given mode"""
+    # Stay on the in-process JVM (via jpype; tabula's default) rather than spawning java per call
+    kwargs = {'pages': pages, 'multiple_tables': True, 'guess': guess, 'force_subprocess': False}
+    if mode == 'stream':
+        kwargs['stream'] = True
+    elif mode == 'lattice':
+        kwargs['lattice'] = True
+    else:
+        # Default behavior - let tabula decide
+        pass
+    return kwargs
+
+def _group_json_tables(raw_tables: list) -> Dict[int, List[pd.DataFrame]]:
+    """Convert tabula JSON tables to DataFrames grouped by page number"""
+    raw_by_page = {}
+    for table in raw_tables:
+        raw_by_page.setdefault(table['page_number'], []).append(table)
+    # Use tabula-py's own conversion so the tables match read_pdf's dataframe output
+    # (empty tables skipped, blank and duplicate headers renamed, numeric columns converted)
+    return {page_num: _tabula_dataframes_from_json(page_tables)
+            for page_num, page_tables in raw_by_page.items()}
+
+# tabula starts its JVM lazily on the first read_pdf call; with several request
+# threads per worker, concurrent first calls would otherwise race in jpype.startJVM
+_JVM_START_LOCK = threading.Lock()
+
+def _read_pdf(pdf_path: str, **kwargs):
+    """Call tabula.read_pdf, serializing calls until the in-process JVM is running"""
+    if jpype.isJVMStarted():
+        return tabula.read_pdf(pdf_path, **kwargs)
+    with _JVM_START_LOCK:
+        return tabula.read_pdf(pdf_path, **kwargs)
+
+def _read_json_tables(pdf_path: str, page_numbers: List[int], mode: str, guess: bool) -> list:
+    """Run one tabula call over the given pages, returning its raw JSON tables"""
+    # JSON output keeps the page number of every table
+    return _read_pdf(pdf_path, output_format='json',
+                     **_tabula_options(page_numbers, mode, guess)) or []
+
+def extract_tables_by_page(pdf_path: str, page_numbers: List[int], mode: str = 'stream',
+                           guess: bool = True, file_hash: Optional[str] = None,
+                           failed_pages: Optional[set] = None) -> Dict[int, List[pd.DataFrame]]:
+    """Extract tables from several pages in one tabula call, grouped by page number"""
+    tables_by_page = {page_num: [] for page_num in page_numbers}
+    
+    # Reuse cached pages when the PDF content hash is known
+    missing_pages = []
+    for page_num in page_numbers:
+        hit, dfs = _cache_load((file_hash, page_num, mode, guess)) if file_hash else (False, None)
+        if hit:
+            tables_by_page[page_num] = dfs
         else:
-            # Default behavior - let tabula decide
-            pass
-        
-        dfs = tabula.read_pdf(pdf_path, **kwargs)
-        return dfs or []
+            missing_pages.append(page_num)
+    
+    if not missing_pages:
+        return tables_by_page
+    
+    try:
+        raw_tables = _read_json_tables(pdf_path, missing_pages, mode, guess)
+        extracted_pages = missing_pages
     except Exception as e:
         print(f"Error extracting tables with mode {mode}: {e}")
-        return []
+        # Retry page by page so one failing page does not empty the whole batch
+        raw_tables = []
+        extracted_pages = []
+        if len(missing_pages) > 1:
+            for page_num in missing_pages:
+                try:
+                    raw_tables.extend(_read_json_tables(pdf_path, [page_num], mode, guess))
+                    extracted_pages.append(page_num)
+                except Exception as e:
+                    print(f"Error extracting tables with mode {mode} on page {page_num}: {e}")
+        # Report the pages that came back empty only because tabula raised
+        if failed_pages is not None:
+            failed_pages.update(set(missing_pages) - set(extracted_pages))
+    
+    tables_by_page.update(_group_json_tables(raw_tables))
+    
+    if file_hash:
+        # Only pages that were actually extracted are cached, never a failure
+        for page_num in extracted_pages:
+            _cache_store((file_hash, page_num, mode, guess), tables_by_page[page_num])
+    return tables_by_page
+
+def _extract_tables_per_mode(pdf_path: str, page_modes: Dict[int, str], guess: bool = True,
+                             file_hash: Optional[str] = None,
+                             failed_pages: Optional[set] = None) -> Dict[int, List[pd.DataFrame]]:
+    """Extract each page with its assigned mode, using one tabula call per mode"""
+    tables_by_page = {}
+    modes = sorted(set(page_modes.values()))
+    pages_per_mode = [[page_num for page_num, page_mode in page_modes.items() if page_mode == mode]
+                      for mode in modes]
+    
+    def extract_mode(mode, mode_pages):
+        return extract_tables_by_page(pdf_path, mode_pages, mode=mode, guess=guess, file_hash=file_hash,
+                                      failed_pages=failed_pages)
+    
+    # The JVM releases the GIL, so stream and lattice batches can run side by side.
+    # Until the JVM is up, _read_pdf runs calls one at a time anyway.
+    if len(modes) > 1 and jpype.isJVMStarted():
+        with ThreadPoolExecutor(max_workers=len(modes)) as executor:
+            for mode_tables in executor.map(extract_mode, modes, pages_per_mode):
+                tables_by_page.update(mode_tables)
+    else:
+        for mode, mode_pages in zip(modes, pages_per_mode):
+            tables_by_page.update(extract_mode(mode, mode_pages))
+    return tables_by_page
+
+def _read_page_lines(plumber, pdf_path: str, pages: str = 'all') -> Tuple[List[int], list, List[int]]:
+    """Read page numbers, (page index, x0, y0, x1, y1) line rows and failed pages with a pdfplumber-like module"""
+    page_numbers = []
+    line_rows = []
+    error_pages = []
+    # For now, handle 'all' case. Can extend to parse page ranges later;
+    # anything else falls back to the first page, the only one pdfplumber then loads
+    with plumber.open(pdf_path, pages=None if pages == 'all' else [1]) as pdf:
+        for page_idx, page in enumerate(pdf.pages):
+            page_numbers.append(page.page_number)
+            try:
+                line_rows.extend((page_idx, ln["x0"], ln["y0"], ln["x1"], ln["y1"]) for ln in page.lines or [])
+            except Exception as e:
+                print(f"Error detecting vertical lines: {e}")
+                error_pages.append(page.page_number)
+            # Drop the page's parsed layout objects so memory stays flat on long PDFs;
+            # backends without flush_cache simply keep them
+            flush_cache = getattr(page, 'flush_cache', None)
+            if flush_cache is not None:
+                flush_cache()
+    return page_numbers, line_rows, error_pages
+
+def _detect_page_lines(pdf_path: str, pages: str = 'all',
+                       failed_pages: Optional[set] = None) -> Tuple[List[int], List[int]]:
+    """Open the PDF once to determine pages and detect vertical lines on each"""
+    page_lines = None
+    if pdfplumber_rs is not None:
+        try:
+            page_lines = _read_page_lines(pdfplumber_rs, pdf_path, pages)
+        except Exception as e:
+            # pdfplumber-rs is an optional backend: any failure in it (missing API, a
+            # parser error on this PDF) is retried with pdfplumber
+            print(f"pdfplumber-rs failed, falling back to pdfplumber: {e}")
+    if page_lines is None:
+        page_lines = _read_page_lines(pdfplumber, pdf_path, pages)
+    page_numbers, line_rows, error_pages = page_lines
+    # Report the pages counted as line-free only because reading their lines raised
+    if failed_pages is not None:
+        failed_pages.update(error_pages)
+    
+    # Test every line of the document at once and count the vertical ones per page
+    coords = np.array(line_rows, dtype=_LINE_DTYPE)
+    vertical_pages = coords['page'][_vertical_mask(coords)]
+    vlines_per_page = np.bincount(vertical_pages, minlength=len(page_numbers)).tolist()
+    return page_numbers, vlines_per_page
+
+@lru_cache(maxsize=64)
+def _cached_file_sha256(pdf_path: str, mtime_ns: int, size: int) -> str:
+    """Hash a PDF, memoized per path, mtime and size"""
+    return file_sha256(pdf_path)
+
+class _PartialPageLines(Exception):
+    """Carries line counts detected with page errors out of the memoized function uncached"""
+
+    def __init__(self, page_lines, failed_pages):
+        super().__init__(failed_pages)
+        self.page_lines = page_lines
+        self.failed_pages = failed_pages
+
+@lru_cache(maxsize=64)
+def _memoized_page_lines(file_hash: str, pdf_path: str, pages: str) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """Detect the vertical lines of a PDF, memoized in memory and on disk by content hash"""
+    hit, page_lines = _cache_load((file_hash, 'vlines', pages))
+    if not hit:
+        failed_pages = set()
+        page_lines = _detect_page_lines(pdf_path, pages, failed_pages=failed_pages)
+        if failed_pages:
+            # Raising keeps lru_cache from memoizing the result; it is not stored on disk either
+            raise _PartialPageLines(page_lines, failed_pages)
+        _cache_store((file_hash, 'vlines', pages), page_lines)
+    page_numbers, vlines_per_page = page_lines
+    return tuple(page_numbers), tuple(vlines_per_page)
+
+def _cached_page_lines(file_hash: str, pdf_path: str, pages: str,
+                       failed_pages: Optional[set] = None) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """Detect the vertical lines of a PDF, caching only runs where every page was read"""
+    try:
+        return _memoized_page_lines(file_hash, pdf_path, pages)
+    except _PartialPageLines as e:
+        if failed_pages is not None:
+            failed_pages.update(e.failed_pages)
+        page_numbers, vlines_per_page = e.page_lines
+        return tuple(page_numbers), tuple(vlines_per_page)
+
+def _table_cache_dir(file_hash: str, pages: str) -> str:
+    """Return the directory holding the cached final tables of a PDF"""
+    # Keyed by code version too, so changes to the clean-up or scoring never reuse old tables
+    return os.path.join(TABLE_CACHE_DIR, f"{file_hash}_{pages}_{_code_version()}")
+
+def load_cached_tables(file_hash: str, pages: str = 'all') -> Optional[Tuple[List[pd.DataFrame], Dict[int, str]]]:
+    """Load cached hybrid extraction results, or None on a miss"""
+    cache_dir = _table_cache_dir(file_hash, pages)
+    try:
+        with open(os.path.join(cache_dir, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        tables = []
+        for i, columns in enumerate(meta['columns']):
+            df = pq.read_table(os.path.join(cache_dir, f"table_{i}.parquet")).to_pandas()
+            df.columns = columns
+            tables.append(df)
+    except (OSError, ValueError, KeyError, pa.ArrowException):
+        return None
+    mode_info = {int(page_num): mode for page_num, mode in meta['mode_info'].items()}
+    return tables, mode_info
+
+def store_cached_tables(file_hash: str, pages: str, tables: List[pd.DataFrame], mode_info: Dict[int, str]):
+    """Cache hybrid extraction results as Parquet files plus a meta.json"""
+    cache_dir = _table_cache_dir(file_hash, pages)
+    if os.path.exists(cache_dir):
+        return
+    
+    tmp_dir = None
+    try:
+        os.makedirs(TABLE_CACHE_DIR, exist_ok=True)
+        # Fill a temporary directory first so readers never see a partial entry
+        tmp_dir = tempfile.mkdtemp(dir=TABLE_CACHE_DIR, suffix='.tmp')
+        for i, df in enumerate(tables):
+            # Parquet needs unique string column names; the real ones go into meta.json
+            table = pa.Table.from_pandas(df.set_axis([str(j) for j in range(df.shape[1])], axis=1))
+            pq.write_table(table, os.path.join(tmp_dir, f"table_{i}.parquet"), compression='zstd')
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'columns': [list(df.columns) for df in tables], 'mode_info': mode_info},
+                      f, ensure_ascii=False)
+        os.replace(tmp_dir, cache_dir)
+        tmp_dir = None
+    except (OSError, TypeError, ValueError, pa.ArrowException) as e:
+        # Tables with mixed-type columns cannot be stored as Parquet; just skip caching them
+        print(f"Error writing table cache: {e}")
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
 
-def extract_tables_hybrid(pdf_path: str, pages: str = 'all') -> Tuple[List[pd.DataFrame], Dict[int, str]]:
+def extract_tables_hybrid(pdf_path: str, pages: str = 'all',
+                          use_cache: bool = False) -> Tuple[List[pd.DataFrame], Dict[int, str]]:
     """Extract tables using hybrid approach with automatic mode selection"""
     results = []
     mode_info = {}
     
-    # Determine pages to process
-    if pages == 'all':
-        with pdfplumber.open(pdf_path) as pdf:
-            page_numbers = list(range(1, len(pdf.pages) + 1))
+    # Pages where line detection or a tabula call failed; a run with any failure is never cached
+    failed_pages = set()
+    
+    # Cache final tables, line detection and per-page tabula results by PDF content
+    if use_cache:
+        stat = os.stat(pdf_path)
+        file_hash = _cached_file_sha256(pdf_path, stat.st_mtime_ns, stat.st_size)
+        cached = load_cached_tables(file_hash, pages)
+        if cached is not None:
+            return cached
+        page_numbers, vlines_per_page = _cached_page_lines(file_hash, pdf_path, pages,
+                                                           failed_pages=failed_pages)
     else:
-        # For now, handle 'all' case. Can extend to parse page ranges later
-        page_numbers = [1]  # Fallback to first page
+        file_hash = None
+        page_numbers, vlines_per_page = _detect_page_lines(pdf_path, pages, failed_pages=failed_pages)
     
-    # Process each page
-    for page_num in page_numbers:
-        # Detect vertical lines
-        vlines = detect_vertical_lines(pdf_path, page_num)
-        initial_mode = 'lattice' if vlines >= 6 else 'stream'
-        
-        # Try both modes
-        dfs_initial = extract_tables_with_mode(pdf_path, str(page_num), mode=initial_mode, guess=True)
-        alt_mode = 'stream' if initial_mode == 'lattice' else 'lattice'
-        dfs_alt = extract_tables_with_mode(pdf_path, str(page_num), mode=alt_mode, guess=True)
-        
-        # Score both results
-        score_initial = score_tables(dfs_initial)
-        score_alt = score_tables(dfs_alt)
-        
-        # Choose better result
-        if score_alt > score_initial:
-            results.extend(dfs_alt)
+    # Pages with enough vertical lines are likely ruled tables
+    initial_modes = {page_num: 'lattice' if vlines >= 6 else 'stream'
+                     for page_num, vlines in zip(page_numbers, vlines_per_page)}
+    
+    # Extract all pages in their initial mode, batched into one tabula call per mode
+    page_tables = _extract_tables_per_mode(pdf_path, initial_modes, file_hash=file_hash,
+                                           failed_pages=failed_pages)
+    page_scores = {page_num: score_tables(page_tables[page_num]) for page_num in page_numbers}
+    mode_info.update(initial_modes)
+    
+    # Try the other mode only on pages whose initial result is not already good
+    alt_modes = {page_num: 'stream' if mode == 'lattice' else 'lattice'
+                 for page_num, mode in initial_modes.items()
+                 if page_scores[page_num] < CONFIDENCE_THRESHOLD}
+    alt_tables = _extract_tables_per_mode(pdf_path, alt_modes, file_hash=file_hash,
+                                          failed_pages=failed_pages)
+    
+    # Choose better result
+    for page_num, alt_mode in alt_modes.items():
+        score_alt = score_tables(alt_tables[page_num])
+        if score_alt > page_scores[page_num]:
+            page_tables[page_num] = alt_tables[page_num]
+            page_scores[page_num] = score_alt
             mode_info[page_num] = alt_mode
-        else:
-            results.extend(dfs_initial)
-            mode_info[page_num] = initial_mode
-        
-        # If both failed, try with guess=False
-        if max(score_initial, score_alt) < 0:
-            for mode in ['stream', 'lattice']:
-                dfs_retry = extract_tables_with_mode(pdf_path, str(page_num), mode=mode, guess=False)
-                if score_tables(dfs_retry) > max(score_initial, score_alt):
-                    results = [df for df in results if df is not None]  # Remove previous results for this page
-                    results.extend(dfs_retry)
-                    mode_info[page_num] = mode
-                    break
+    
+    # If both failed, try with guess=False (stream first, then lattice)
+    retry_pages = [page_num for page_num in alt_modes if page_scores[page_num] < 0]
+    for mode in ['stream', 'lattice']:
+        if not retry_pages:
+            break
+        retry_tables = extract_tables_by_page(pdf_path, retry_pages, mode=mode, guess=False,
+                                              file_hash=file_hash, failed_pages=failed_pages)
+        remaining_pages = []
+        for page_num in retry_pages:
+            if score_tables(retry_tables[page_num]) > page_scores[page_num]:
+                page_tables[page_num] = retry_tables[page_num]
+                mode_info[page_num] = mode
+            else:
+                remaining_pages.append(page_num)
+        retry_pages = remaining_pages
+    
+    # Collect results in page order
+    for page_num in page_numbers:
+        results.extend(page_tables[page_num])
     
     # Try to fix tables with potential column merge issues
-    fixed_results = []
-    for df in results:
-        # Apply both fixing methods
-        fixed_df = fix_merged_columns(df)
-        # Apply advanced post-processing
-        fixed_df = post_process_table(fixed_df)
-        fixed_results.append(fixed_df)
+    fixed_results = [_analyze_and_split(df) for df in results]
+    
+    if file_hash and not failed_pages:
+        store_cached_tables(file_hash, pages, fixed_results, mode_info)
     
     return fixed_results, mode_info
 
 def fix_merged_columns(df):
     """Attempt to fix tables where multiple columns have been merged into one"""
+    return _fix_merged_columns(df)[0]
+
+def _fix_merged_columns(df):
+    """Fix merged columns, returning (table, per-column flags for columns produced by a split or None)"""
     if df.empty:
-        return df
-    
-    # Create a copy
-    df_copy = df.copy()
+        return df, None
     
     # Analyze all cells to detect consistent patterns of space-separated values
     max_parts_per_column = []
-    split_info = []  # Store information about how to split each column
+    column_cells = []  # Cell text per column, NaN where the cell is empty
     
-    for col_idx in range(len(df_copy.columns)):
-        max_parts = 1
-        # Analyze multiple rows to get a better understanding of the pattern
-        value_patterns = []
+    for col_idx in range(len(df.columns)):
+        cells = _cell_text(df.iloc[:, col_idx])
+        column_cells.append(cells)
         
-        for _, row in df_copy.iterrows():
-            cell_value = str(row.iloc[col_idx])
-            if cell_value not in ['nan', 'NaN', '', None]:
-                # Count space-separated parts
-                parts = cell_value.split()
-                if len(parts) > 1:
-                    # Analyze each part
-                    part_types = []
-                    for p in parts:
-                        clean_p = p.replace(',', '')
-                        if clean_p.replace('.', '').replace('-', '').isdigit():
-                            part_types.append('NUM')
-                        elif '%' in p:
-                            part_types.append('PCT')
-                        elif any(c.isdigit() for c in p):
-                            part_types.append('MIXED')
-                        else:
-                            part_types.append('TEXT')
-                    
-                    value_patterns.append((len(parts), part_types))
-                    
-                    # If most parts are numeric, consider splitting
-                    numeric_count = sum(1 for t in part_types if t in ['NUM', 'PCT'])
-                    if numeric_count >= len(parts) * 0.5:  # At least half are numeric
-                        max_parts = max(max_parts, len(parts))
+        max_parts = 1
+        if cells.notna().any():
+            # Count space-separated parts and how many of them are NUM or PCT
+            parts = cells.str.split(expand=True)
+            n_parts = parts.notna().sum(axis=1)
+            is_numeric = parts.apply(lambda p: _classify_parts(p).isin(['NUM', 'PCT']))
+            numeric_count = is_numeric.sum(axis=1)
+            
+            # If most parts are numeric, consider splitting
+            splittable = (n_parts > 1) & (numeric_count >= n_parts * 0.5)  # At least half are numeric
+            if splittable.any():
+                max_parts = int(n_parts[splittable].max())
         
         max_parts_per_column.append(max_parts)
-        split_info.append({'max_parts': max_parts, 'patterns': value_patterns})
     
     # If any column needs splitting, rebuild the dataframe
     if any(m > 1 for m in max_parts_per_column):
-        new_data = []
         new_columns = []
         
         # Generate new column names based on the header and patterns
-        for col_idx, (col_name, info) in enumerate(zip(df_copy.columns, split_info)):
-            max_parts = info['max_parts']
-            
+        for col_idx, (col_name, max_parts) in enumerate(zip(df.columns, max_parts_per_column)):
             if max_parts > 1:
                 col_str = str(col_name).strip()
                 
@@ -244,119 +629,130 @@ def fix_merged_columns(df):
             else:
                 new_columns.append(col_name)
         
-        # Process each row with improved splitting logic
-        for _, row in df_copy.iterrows():
-            new_row = []
-            for col_idx, info in enumerate(split_info):
-                max_parts = info['max_parts']
-                cell_value = str(row.iloc[col_idx])
-                
-                if max_parts > 1:
-                    if cell_value not in ['nan', 'NaN', '', None]:
-                        parts = cell_value.split()
-                        
-                        # Ensure we have exactly max_parts values
-                        if len(parts) >= max_parts:
-                            new_row.extend(parts[:max_parts])
-                        else:
-                            # Intelligent padding based on the pattern
-                            new_row.extend(parts)
-                            # Fill remaining with empty strings
-                            new_row.extend([''] * (max_parts - len(parts)))
-                    else:
-                        # Fill with empty strings for NaN values
-                        new_row.extend([''] * max_parts)
-                else:
-                    new_row.append(cell_value if cell_value not in ['nan', 'NaN', None] else '')
-            
-            new_data.append(new_row)
-        
-        # Create new dataframe with split columns
-        result_df = pd.DataFrame(new_data, columns=new_columns)
+        # Split each column into its parts at once, padding short cells with empty strings
+        new_values = _split_columns(column_cells, max_parts_per_column, len(df))
         
-        # Clean up column names
-        result_df.columns = [str(col).strip() for col in result_df.columns]
+        # Create new dataframe with split columns and cleaned up column names
+        result_df = pd.DataFrame(new_values, columns=[str(col).strip() for col in new_columns])
         
         # Remove any completely empty columns that might have been created
-        result_df = result_df.loc[:, (result_df != '').any(axis=0)]
+        non_empty_columns = (new_values != '').any(axis=0)
+        result_df = result_df.iloc[:, non_empty_columns]
         
-        return result_df
+        split_columns = np.repeat([max_parts > 1 for max_parts in max_parts_per_column], max_parts_per_column)
+        return result_df, split_columns[non_empty_columns].tolist()
     
-    return df_copy
+    # Nothing to split, so the input is returned as is without copying
+    return df, None
 
-def extract_tables_from_pdf(pdf_path, use_hybrid=True):
+def extract_tables_from_pdf(pdf_path, use_hybrid=True, use_cache=False):
     """Extract tables from PDF using tabula-py with optional hybrid mode"""
     try:
         if use_hybrid:
-            dfs, mode_info = extract_tables_hybrid(pdf_path)
+            # The on-disk caches are opt-in; they are meant for repeated CLI runs
+            dfs, mode_info = extract_tables_hybrid(pdf_path, use_cache=use_cache)
             print(f"Hybrid extraction used modes: {mode_info}")
             return dfs
         else:
             # Classic mode - original behavior
-            dfs = tabula.read_pdf(pdf_path, pages='all', multiple_tables=True)
+            dfs = _read_pdf(pdf_path, pages='all', multiple_tables=True, force_subprocess=False)
             return dfs
     except Exception as e:
         print(f"Error extracting tables from PDF: {e}")
         return None
 
+def extract_content_pymupdf(pdf_path):
+    """Extract text and tables in a single PyMuPDF pass, without tabula's JVM"""
+    try:
+        text_parts = []
+        tables = []
+        with fitz.open(pdf_path) as doc:
+            for page_num, page in enumerate(doc):
+                text_parts.append(f"\n--- Page {page_num + 1} ---\n")
+                text_parts.append(page.get_text())
+                for table in page.find_tables().tables:
+                    df = table.to_pandas()
+                    if not df.empty:
+                        # Same clean-up as the hybrid tabula results
+                        tables.append(_analyze_and_split(df))
+        return "".join(text_parts), tables
+    except Exception as e:
+        print(f"Error extracting content with PyMuPDF: {e}")
+        return None, None
+
 def process_table_with_newlines(df):
     """Process table to handle cells with newline-separated data and space-separated values"""
-    processed_rows = []
+    # Work on positional columns so duplicated column names don't get in the way
+    values = df.reset_index(drop=True)
+    values.columns = range(values.shape[1])
+    
+    # Find the string columns that contain newline characters, keeping only
+    # the cells to split (NA elsewhere) so each column is stringified once.
+    # Arrow-backed strings run contains/count/split in Arrow's C++ kernels.
+    split_cells = {}
+    for col in values.select_dtypes(include=object).columns:
+        as_str = values[col].astype('string[pyarrow]')
+        mask = as_str.str.contains('\r', regex=False).fillna(False).astype(bool)
+        if mask.any():
+            split_cells[col] = as_str.where(mask)
+    
+    if not split_cells:
+        processed_df = values.copy()
+        processed_df.columns = df.columns
+        return processed_df
+    
+    # Each source row expands to as many rows as its most-split cell
+    counts = np.column_stack([
+        cells.str.count('\r').fillna(0).to_numpy(dtype=np.int64) for cells in split_cells.values()
+    ])
+    repeats = counts.max(axis=1) + 1
+    row_idx = np.repeat(np.arange(len(values)), repeats)
+    offsets = np.arange(len(row_idx)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
     
-    for _, row in df.iterrows():
-        # Check if any cell in the row contains newline characters
-        has_newline = any(isinstance(val, str) and '\r' in val for val in row)
+    processed = {}
+    for col in values.columns:
+        # Cells without newlines keep their value on the first row only
+        column = np.where(offsets > 0, '', values[col].to_numpy(dtype=object)[row_idx])
         
-        if has_newline:
-            # Split cells with newlines and create multiple rows
-            max_splits = max([len(str(val).split('\r')) if isinstance(val, str) and '\r' in val else 1 for val in row])
-            
-            for i in range(max_splits):
-                new_row = []
-                for val in row:
-                    if isinstance(val, str) and '\r' in val:
-                        split_vals = val.split('\r')
-                        new_row.append(split_vals[i] if i < len(split_vals) else '')
-                    else:
-                        new_row.append(val if i == 0 else '')
-                processed_rows.append(new_row)
-        else:
-            processed_rows.append(row.tolist())
+        if col in split_cells:
+            cells = split_cells[col]
+            parts = cells.str.split('\r', expand=True).to_numpy(dtype=object)
+            split_vals = np.full(len(row_idx), '', dtype=object)
+            in_range = offsets < parts.shape[1]
+            split_vals[in_range] = parts[row_idx[in_range], offsets[in_range]]
+            split_vals[pd.isna(split_vals)] = ''
+            column = np.where(cells.notna().to_numpy()[row_idx], split_vals, column)
+        
+        processed[col] = column
     
     # Create new dataframe with processed rows
-    processed_df = pd.DataFrame(processed_rows, columns=df.columns)
+    processed_df = pd.DataFrame(processed).infer_objects()
+    processed_df.columns = df.columns
     return processed_df
 
-def detect_column_structure(df):
+def detect_column_structure(df, skip_columns=None):
     """Detect the structure of columns based on patterns in the data"""
     column_patterns = []
     
     for col_idx in range(len(df.columns)):
+        if skip_columns is not None and skip_columns[col_idx]:
+            # Known to hold single values already; kept as one column
+            column_patterns.append(())
+            continue
+        
         patterns = []
-        for _, row in df.iterrows():
-            cell_value = str(row.iloc[col_idx])
-            if cell_value not in ['nan', 'NaN', '', None]:
-                # Analyze the pattern of the cell
-                parts = cell_value.split()
-                if parts:
-                    # Record pattern: number of parts and their types
-                    pattern = []
-                    for part in parts:
-                        # Remove commas and check if numeric
-                        clean_part = part.replace(',', '').replace('.', '')
-                        if clean_part.replace('-', '').isdigit():
-                            pattern.append('NUM')
-                        elif '%' in part:
-                            pattern.append('PCT')
-                        elif any(c.isdigit() for c in part):
-                            pattern.append('MIXED')
-                        else:
-                            pattern.append('TEXT')
-                    patterns.append(tuple(pattern))
+        cells = _cell_text(df.iloc[:, col_idx])
+        if cells.notna().any():
+            # Classify every part of the column at once, one labels column per part position
+            labels = cells.str.split(expand=True).apply(_classify_parts)
+            for row_labels in labels.itertuples(index=False, name=None):
+                # Record pattern: number of parts and their types
+                pattern = tuple(label for label in row_labels if label is not None)
+                if pattern:
+                    patterns.append(pattern)
         
         # Find the most common pattern for this column
         if patterns:
-            from collections import Counter
             most_common_pattern = Counter(patterns).most_common(1)[0][0]
             column_patterns.append(most_common_pattern)
         else:
@@ -364,21 +760,10 @@ def detect_column_structure(df):
     
     return column_patterns
 
-def split_merged_cells_advanced(df):
+def split_merged_cells_advanced(df, skip_columns=None):
     """Advanced splitting of merged cells based on detected patterns"""
     # First detect column patterns
-    patterns = detect_column_structure(df)
-    
-    # Create new data structure
-    new_data = []
-    max_columns_needed = 0
-    
-    # First pass: determine maximum columns needed
-    for col_idx, pattern in enumerate(patterns):
-        if len(pattern) > 1:
-            max_columns_needed += len(pattern)
-        else:
-            max_columns_needed += 1
+    patterns = detect_column_structure(df, skip_columns)
     
     # Generate appropriate column headers
     new_columns = []
@@ -412,124 +797,211 @@ def split_merged_cells_advanced(df):
             new_columns.append(col_name)
             col_counter += 1
     
-    # Process each row
-    for _, row in df.iterrows():
-        new_row = []
-        for col_idx, pattern in enumerate(patterns):
-            cell_value = str(row.iloc[col_idx])
-            
-            if len(pattern) > 1 and cell_value not in ['nan', 'NaN', '', None]:
-                parts = cell_value.split()
-                # Ensure we match the pattern length
-                if len(parts) >= len(pattern):
-                    new_row.extend(parts[:len(pattern)])
-                else:
-                    new_row.extend(parts + [''] * (len(pattern) - len(parts)))
-            elif len(pattern) > 1:
-                # Fill with empty values for NaN cells
-                new_row.extend([''] * len(pattern))
-            else:
-                new_row.append(cell_value if cell_value not in ['nan', 'NaN', None] else '')
-        
-        new_data.append(new_row)
-    
-    return pd.DataFrame(new_data, columns=new_columns)
+    # Split each column to match its pattern length
+    column_cells = [_cell_text(df.iloc[:, col_idx]) for col_idx in range(len(patterns))]
+    widths = [max(len(pattern), 1) for pattern in patterns]
+    return pd.DataFrame(_split_columns(column_cells, widths, len(df)), columns=new_columns)
 
-def post_process_table(df):
+def _analyze_and_split(df):
+    """Fix merged columns and clean up an extracted table in one call"""
+    fixed_df, split_columns = _fix_merged_columns(df)
+    return post_process_table(fixed_df, split_columns=split_columns)
+
+def post_process_table(df, split_columns=None):
     """Enhanced post-processing to handle complex table structures"""
     if df.empty:
         return df
     
-    # First try the basic fix_merged_columns
-    # This is already called in extract_tables_hybrid, but we'll ensure it's thorough
-    processed_df = df.copy()
-    
-    # Additional cleanup and normalization
-    # Replace various forms of NaN with empty strings
-    processed_df = processed_df.replace(['nan', 'NaN', None, 'None'], '')
-    
-    # Try advanced splitting if needed
+    # Try advanced splitting if needed (missing cells are treated as empty there).
+    # Columns fix_merged_columns produced by splitting hold single values, so their
+    # pattern detection is skipped; every other column is still analyzed
+    processed_df = df
     if processed_df.shape[1] < 30:  # If we have fewer columns than expected
-        processed_df = split_merged_cells_advanced(processed_df)
+        processed_df = split_merged_cells_advanced(processed_df, skip_columns=split_columns)
     
-    # Final cleanup
-    processed_df = processed_df.replace(['nan', 'NaN', None], '')
+    # Replace various forms of NaN with empty strings in a single pass
+    processed_df = processed_df.where(~(processed_df.isna() | processed_df.isin(_NAN_SENTINELS)), '')
     
-    # Remove completely empty rows and columns
-    processed_df = processed_df.loc[(processed_df != '').any(axis=1)]
-    processed_df = processed_df.loc[:, (processed_df != '').any(axis=0)]
+    # Remove completely empty rows and columns with one mask over the cell values
+    non_empty = processed_df.to_numpy(dtype=object) != ''
+    processed_df = processed_df.iloc[non_empty.any(axis=1), non_empty.any(axis=0)]
     
     return processed_df
 
 def convert_to_numeric(df):
     """Convert string columns to numeric where appropriate"""
-    df_converted = df.copy()
+    if df.empty:
+        return df.copy()
     
-    for col in df_converted.columns:
-        # Try to convert each column to numeric
-        # First, handle Japanese number formatting (remove commas)
-        temp_col = df_converted[col].astype(str).str.replace(',', '')
-        
-        # Try to convert to numeric, keeping non-numeric as is
-        try:
-            # Use errors='coerce' to convert non-numeric to NaN, then fill back original values
-            numeric_col = pd.to_numeric(temp_col, errors='coerce')
-            
-            # Only convert if at least 30% of non-empty values are numeric
-            non_empty_mask = (df_converted[col].astype(str).str.strip() != '') & (df_converted[col].notna())
-            if non_empty_mask.any():
-                numeric_ratio = numeric_col.notna().sum() / non_empty_mask.sum()
-                
-                if numeric_ratio >= 0.3:
-                    # Replace only the successfully converted numeric values
-                    mask = numeric_col.notna()
-                    df_converted.loc[mask, col] = numeric_col[mask]
-        except:
-            # If conversion fails, keep original
-            pass
+    as_str = df.astype(str)
+    
+    # Convert each column in one vectorized call, handling Japanese number
+    # formatting (remove commas); non-numeric cells become NaN
+    numeric = as_str.apply(lambda col: pd.to_numeric(col.str.replace(',', '', regex=False), errors='coerce'))
+    is_numeric = numeric.notna().to_numpy()
+    non_empty = as_str.apply(lambda col: col.str.strip() != '').to_numpy() & df.notna().to_numpy()
     
-    return df_converted
+    # Only convert columns where at least 30% of non-empty values are numeric
+    numeric_counts = is_numeric.sum(axis=0)
+    non_empty_counts = non_empty.sum(axis=0)
+    convert_cols = (non_empty_counts > 0) & (numeric_counts >= 0.3 * non_empty_counts)
+    
+    # Replace only the successfully converted values, keeping the rest as is
+    mask = is_numeric & convert_cols
+    converted = np.where(mask, numeric.to_numpy(dtype=object), df.to_numpy(dtype=object))
+    return pd.DataFrame(converted, index=df.index, columns=df.columns).infer_objects()
+
+def _prepare_table(df):
+    """Split newline cells and convert numbers for a single table"""
+    processed_df = process_table_with_newlines(df)
+    return processed_df, convert_to_numeric(processed_df)
 
-def save_to_excel(tables, text, base_filename):
-    """Save extracted tables and text to Excel file"""
-    excel_filename = f"output/{base_filename}_extracted_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+def prepare_tables(tables, parallel=True):
+    """Prepare tables for output, returning (processed tables for CSV, numeric tables for Excel)"""
+    n_workers = min(len(tables), os.cpu_count() or 1)
+    if not parallel or n_workers < 2 or sum(df.size for df in tables) < PARALLEL_TABLES_MIN_CELLS:
+        results = [_prepare_table(df) for df in tables]
+    else:
+        # Tables are independent, so spread the pandas work across cores. Spawn rather
+        # than fork: the parent may be multi-threaded and already host the JVM
+        with ProcessPoolExecutor(max_workers=n_workers,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            results = list(executor.map(_prepare_table, tables))
     
-    with pd.ExcelWriter(excel_filename, engine='openpyxl') as writer:
-        for i, df in enumerate(tables):
-            # Process table to handle newlines
-            processed_df = process_table_with_newlines(df)
-            
-            # Convert numeric strings to actual numbers
-            processed_df = convert_to_numeric(processed_df)
-            
+    processed_tables = [processed_df for processed_df, _ in results]
+    numeric_tables = [numeric_df for _, numeric_df in results]
+    return processed_tables, numeric_tables
+
+def write_excel_sheet(workbook, sheet_name, df, header_format=None):
+    """Write a DataFrame to a new worksheet row by row"""
+    # xlsxwriter's constant_memory mode flushes each row once the next one starts,
+    # so rows must be written in order (pandas' to_excel writes column by column)
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, [str(col) for col in df.columns], header_format)
+    for row_idx, row in enumerate(df.itertuples(index=False, name=None), 1):
+        worksheet.write_row(row_idx, 0, [None if pd.isna(val) else val for val in row])
+    return worksheet
+
+def write_text_sheet(workbook, text, header_format=None):
+    """Write extracted text to a Text_Content sheet, split across cells to fit Excel's limit"""
+    worksheet = workbook.add_worksheet('Text_Content')
+    worksheet.write_string(0, 0, 'Text Content', header_format)
+    for row_idx, start in enumerate(range(0, len(text), EXCEL_TEXT_CHUNK_SIZE), 1):
+        worksheet.write_string(row_idx, 0, text[start:start + EXCEL_TEXT_CHUNK_SIZE])
+    return worksheet
+
+def _output_timestamp():
+    """Timestamp used in output file names"""
+    return datetime.now().strftime('%Y%m%d_%H%M%S')
+
+def save_to_excel(tables, text, base_filename, timestamp=None):
+    """Save numeric-converted tables and text to Excel file"""
+    timestamp = timestamp or _output_timestamp()
+    excel_filename = f"output/{base_filename}_extracted_{timestamp}.xlsx"
+    
+    with xlsxwriter.Workbook(excel_filename, {'constant_memory': True, 'strings_to_urls': False}) as workbook:
+        header_format = workbook.add_format(EXCEL_HEADER_FORMAT)
+        for i, numeric_df in enumerate(tables):
             sheet_name = f'Table_{i+1}'
-            processed_df.to_excel(writer, sheet_name=sheet_name, index=False)
+            write_excel_sheet(workbook, sheet_name, numeric_df, header_format)
         
-        text_df = pd.DataFrame({'Text Content': [text]})
-        text_df.to_excel(writer, sheet_name='Text_Content', index=False)
+        write_text_sheet(workbook, text, header_format)
     
     print(f"Saved to Excel: {excel_filename}")
     return excel_filename
 
-def save_to_csv(tables, text, base_filename):
-    """Save extracted tables to CSV files"""
-    csv_files = []
+def write_csv_file(df, csv_filename):
+    """Write a DataFrame to a UTF-8 CSV file (with BOM) using pyarrow"""
+    # pyarrow quotes every string value, so numeric columns stay typed to be written
+    # unquoted as before; mixed object columns cannot be converted to Arrow types
+    # directly and are rendered as text. NaN becomes an empty field either way
+    arrays = []
+    for i in range(df.shape[1]):
+        col = df.iloc[:, i]
+        if pd.api.types.is_numeric_dtype(col.dtype):
+            arrays.append(pa.array(col, from_pandas=True))
+        else:
+            arrays.append(pa.array(col.astype(str).to_numpy(dtype=object), mask=col.isna().to_numpy()))
+    table = pa.Table.from_arrays(arrays, names=[str(col) for col in df.columns])
     
-    for i, df in enumerate(tables):
-        # Process table to handle newlines
-        processed_df = process_table_with_newlines(df)
-        csv_filename = f"output/{base_filename}_table_{i+1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        processed_df.to_csv(csv_filename, index=False, encoding='utf-8-sig')
-        csv_files.append(csv_filename)
+    with open(csv_filename, 'wb') as f:
+        # Same BOM as encoding='utf-8-sig' so Excel detects UTF-8
+        f.write(codecs.BOM_UTF8)
+        pacsv.write_csv(table, f)
+
+def write_csv_files(tables, csv_filenames):
+    """Write several tables to their CSV files, overlapping the writes in threads"""
+    if len(tables) < 2:
+        for df, csv_filename in zip(tables, csv_filenames):
+            write_csv_file(df, csv_filename)
+        return
+    
+    # pyarrow encodes and writes without holding the GIL, so the tables overlap well
+    with ThreadPoolExecutor(max_workers=min(CSV_WRITE_WORKERS, len(tables))) as executor:
+        list(executor.map(write_csv_file, tables, csv_filenames))
+
+def save_to_csv(tables, text, base_filename, timestamp=None):
+    """Save processed tables to CSV files"""
+    timestamp = timestamp or _output_timestamp()
+    
+    csv_files = [f"output/{base_filename}_table_{i+1}_{timestamp}.csv" for i in range(len(tables))]
+    write_csv_files(tables, csv_files)
+    for i, csv_filename in enumerate(csv_files):
         print(f"Saved table {i+1} to CSV: {csv_filename}")
     
-    text_filename = f"output/{base_filename}_text_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+    text_filename = f"output/{base_filename}_text_{timestamp}.txt"
     with open(text_filename, 'w', encoding='utf-8') as f:
         f.write(text)
     print(f"Saved text to: {text_filename}")
     
     return csv_files
 
+def _process_file(pdf_path, parallel_tables=True):
+    """Extract one PDF and save its Excel, CSV and text outputs"""
+    filename = os.path.basename(pdf_path)
+    base_filename = os.path.splitext(filename)[0]
+    # One timestamp for every output of this file so they sort together
+    timestamp = _output_timestamp()
+    
+    print(f"\nProcessing: {filename}")
+    print("=" * 50)
+    
+    print("\n[Extracting text content...]")
+    text = extract_text_from_pdf(pdf_path)
+    if text:
+        print(f"Extracted {len(text)} characters of text")
+    
+    print("\n[Extracting tables...]")
+    tables = extract_tables_from_pdf(pdf_path, use_cache=True)
+    if tables:
+        print(f"Found {len(tables)} table(s)")
+        
+        # Process tables once for both outputs
+        processed_tables, numeric_tables = prepare_tables(tables, parallel=parallel_tables)
+        
+        print("\n[Saving to Excel...]")
+        save_to_excel(numeric_tables, text or "", base_filename, timestamp)
+        
+        print("\n[Saving to CSV...]")
+        save_to_csv(processed_tables, text or "", base_filename, timestamp)
+    else:
+        print("No tables found or error occurred")
+        
+        if text:
+            text_filename = f"output/{base_filename}_text_only_{timestamp}.txt"
+            with open(text_filename, 'w', encoding='utf-8') as f:
+                f.write(text)
+            print(f"Saved text only to: {text_filename}")
+
+def _process_file_in_worker(pdf_path):
+    """Process one PDF in a file pool worker, returning its log instead of printing it"""
+    # Buffer the output so logs of files processed at the same time don't interleave
+    log = io.StringIO()
+    with redirect_stdout(log):
+        # The file pool already uses the cores, so don't nest a table pool in it
+        _process_file(pdf_path, parallel_tables=False)
+    return log.getvalue()
+
 def main():
     pdf_dir = "pdf"
     output_dir = "output"
@@ -537,37 +1009,19 @@ def main():
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
-    for filename in os.listdir(pdf_dir):
-        if filename.endswith('.pdf'):
-            pdf_path = os.path.join(pdf_dir, filename)
-            base_filename = os.path.splitext(filename)[0]
-            
-            print(f"\nProcessing: {filename}")
-            print("=" * 50)
-            
-            print("\n[Extracting text content...]")
-            text = extract_text_from_pdf(pdf_path)
-            if text:
-                print(f"Extracted {len(text)} characters of text")
-            
-            print("\n[Extracting tables...]")
-            tables = extract_tables_from_pdf(pdf_path)
-            if tables:
-                print(f"Found {len(tables)} table(s)")
-                
-                print("\n[Saving to Excel...]")
-                save_to_excel(tables, text or "", base_filename)
-                
-                print("\n[Saving to CSV...]")
-                save_to_csv(tables, text or "", base_filename)
-            else:
-                print("No tables found or error occurred")
-                
-                if text:
-                    text_filename = f"output/{base_filename}_text_only_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-                    with open(text_filename, 'w', encoding='utf-8') as f:
-                        f.write(text)
-                    print(f"Saved text only to: {text_filename}")
+    pdf_paths = [os.path.join(pdf_dir, filename) for filename in os.listdir(pdf_dir) if filename.endswith('.pdf')]
+    if len(pdf_paths) <= 1:
+        for pdf_path in pdf_paths:
+            _process_file(pdf_path)
+        return
+    
+    # Files are independent, so process several at once; each worker starts its own JVM,
+    # and spawn keeps workers from inheriting the parent's threads
+    max_workers = min(MAX_FILE_WORKERS, os.cpu_count() or 1, len(pdf_paths))
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        for log in executor.map(_process_file_in_worker, pdf_paths):
+            print(log, end='')
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,9 +5,11 @@ import os
 from app import app
 
 @pytest.fixture
-def client():
+def client(tmp_path, monkeypatch):
     """Flaskテストクライアントのフィクスチャ"""
     app.config['TESTING'] = True
+    # 結果キャッシュはテストごとの一時ディレクトリに置き、前回の実行結果を再利用しない
+    monkeypatch.setitem(app.config, 'CACHE_DIR', str(tmp_path / 'cache'))
     with app.test_client() as client:
         yield client
 
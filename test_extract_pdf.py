@@ -0,0 +1,269 @@
+import pytest
+import numpy as np
+import pandas as pd
+import fitz
+import extract_pdf
+from extract_pdf import _analyze_and_split, _cached_page_lines, _detect_page_lines, extract_tables_by_page, extract_tables_hybrid, score_dataframe, fix_merged_columns, detect_column_structure, process_table_with_newlines, convert_to_numeric, write_csv_file
+
+class TestDetectVerticalLines:
+    """縦線検出のテスト"""
+
+    @pytest.fixture(autouse=True)
+    def use_pdfplumber(self, monkeypatch):
+        """pdfplumber-rsの有無に関わらずpdfplumberで検出する"""
+        monkeypatch.setattr(extract_pdf, 'pdfplumber_rs', None)
+
+    def test_counts_only_near_vertical_lines(self, tmp_path):
+        """垂直に近い線だけがページごとに数えられることをテスト"""
+        doc = fitz.open()
+        page = doc.new_page()
+        page.draw_line((10, 0), (10, 100))    # 垂直
+        page.draw_line((20, 0), (21, 100))    # ほぼ垂直
+        page.draw_line((0, 50), (100, 50))    # 水平
+        page.draw_line((0, 0), (50, 50))      # 斜め
+        doc.new_page().draw_line((30, 0), (30, 100))
+        pdf_path = tmp_path / 'lines.pdf'
+        doc.save(str(pdf_path))
+        doc.close()
+        assert _detect_page_lines(str(pdf_path)) == ([1, 2], [2, 1])
+
+    def test_page_without_lines(self, tmp_path):
+        """線がないページでは0を返すことをテスト"""
+        doc = fitz.open()
+        doc.new_page()
+        pdf_path = tmp_path / 'blank.pdf'
+        doc.save(str(pdf_path))
+        doc.close()
+        assert _detect_page_lines(str(pdf_path)) == ([1], [0])
+
+    def test_failed_detection_is_not_cached(self, monkeypatch):
+        """読み取りに失敗したページがある結果はキャッシュされないことをテスト"""
+        calls = []
+        stored = []
+
+        def fake_detect(pdf_path, pages, failed_pages=None):
+            calls.append(pdf_path)
+            failed_pages.add(2)
+            return [1, 2], [7, 0]
+
+        monkeypatch.setattr(extract_pdf, '_detect_page_lines', fake_detect)
+        monkeypatch.setattr(extract_pdf, '_cache_load', lambda key: (False, None))
+        monkeypatch.setattr(extract_pdf, '_cache_store', lambda key, value: stored.append(key))
+        for _ in range(2):
+            failed_pages = set()
+            assert _cached_page_lines('hash-of-failing-pdf', 'dummy.pdf', 'all',
+                                      failed_pages=failed_pages) == ((1, 2), (7, 0))
+            assert failed_pages == {2}
+        assert len(calls) == 2
+        assert stored == []
+
+def _json_table(page_number, rows):
+    """tabula-javaのJSON出力形式のテーブルを作成"""
+    return {'page_number': page_number, 'data': [[{'text': text} for text in row] for row in rows]}
+
+# 10行5列の整ったテーブル(スコア約7)と、2列1行の弱いテーブル(スコア約3)
+GOOD_ROWS = [['項目', '2021', '2022', '2023', '2024']] + [['売上', '100', '200', '300', '400']] * 10
+WEAK_ROWS = [['a', 'b'], ['1', '2']]
+
+class FakeTabula:
+    """tabula.read_pdfの代わりに、(モード, guess, ページ)ごとに用意したJSONテーブルを返す"""
+
+    def __init__(self, tables, fail=None):
+        self.tables = tables
+        self.fail = fail or (lambda mode, guess, pages: False)
+        self.calls = []
+
+    def read_pdf(self, pdf_path, output_format=None, pages=None, guess=True, stream=False, lattice=False, **kwargs):
+        mode = 'lattice' if lattice else 'stream'
+        self.calls.append((mode, guess, list(pages)))
+        if self.fail(mode, guess, pages):
+            raise RuntimeError('tabula failed')
+        return [_json_table(page, rows) for page in pages for rows in self.tables.get((mode, guess, page), [])]
+
+class TestExtractTablesByPage:
+    """ページ単位のテーブル抽出のテスト"""
+
+    def test_pages_are_batched_and_grouped(self, monkeypatch):
+        """1回のtabula呼び出しで抽出し、ページごとにまとめられることをテスト"""
+        fake = FakeTabula({
+            ('stream', True, 1): [GOOD_ROWS, []],
+            ('stream', True, 2): [[['', 'A', '', 'A'], ['x', '1', 'y', '2']]],
+        })
+        monkeypatch.setattr(extract_pdf.tabula, 'read_pdf', fake.read_pdf)
+        tables = extract_tables_by_page('dummy.pdf', [1, 2, 3])
+        assert fake.calls == [('stream', True, [1, 2, 3])]
+        # 行のないテーブルはtabula-pyと同じく除外される
+        assert len(tables[1]) == 1
+        assert list(tables[2][0].columns) == ['Unnamed: 0', 'A', 'Unnamed: 2', 'A.1']
+        assert tables[3] == []
+
+    def test_failed_batch_is_retried_page_by_page(self, monkeypatch):
+        """一括呼び出しが失敗した場合、ページごとに再試行されることをテスト"""
+        fake = FakeTabula({('stream', True, 1): [GOOD_ROWS]},
+                          fail=lambda mode, guess, pages: 2 in pages)
+        monkeypatch.setattr(extract_pdf.tabula, 'read_pdf', fake.read_pdf)
+        failed_pages = set()
+        tables = extract_tables_by_page('dummy.pdf', [1, 2], failed_pages=failed_pages)
+        assert fake.calls == [('stream', True, [1, 2]), ('stream', True, [1]), ('stream', True, [2])]
+        assert len(tables[1]) == 1
+        assert tables[2] == []
+        assert failed_pages == {2}
+
+class TestExtractTablesHybrid:
+    """ハイブリッド抽出のモード選択のテスト"""
+
+    def test_mode_selection_and_retry(self, monkeypatch):
+        """確信度の高いページは別モードを試さず、失敗したページはguess=Falseで再試行されることをテスト"""
+        fake = FakeTabula({
+            ('stream', True, 1): [GOOD_ROWS],     # 1ページ目: 最初のstreamで十分
+            ('lattice', True, 2): [WEAK_ROWS],    # 2ページ目: latticeが弱く、streamが良い
+            ('stream', True, 2): [GOOD_ROWS],
+            ('lattice', False, 3): [GOOD_ROWS],   # 3ページ目: guess=Falseのlatticeでのみ抽出できる
+        })
+        monkeypatch.setattr(extract_pdf.tabula, 'read_pdf', fake.read_pdf)
+        monkeypatch.setattr(extract_pdf, '_detect_page_lines', lambda pdf_path, pages, failed_pages=None: ([1, 2, 3], [0, 10, 0]))
+        monkeypatch.setattr(extract_pdf.jpype, 'isJVMStarted', lambda: False)
+
+        tables, mode_info = extract_tables_hybrid('dummy.pdf')
+
+        assert mode_info == {1: 'stream', 2: 'stream', 3: 'lattice'}
+        assert len(tables) == 3
+        assert sorted(fake.calls) == sorted([
+            ('lattice', True, [2]), ('stream', True, [1, 3]),   # 初期モード
+            ('lattice', True, [3]), ('stream', True, [2]),      # 確信度の低いページの別モード
+            ('stream', False, [3]), ('lattice', False, [3]),    # guess=Falseでの再試行
+        ])
+
+class TestScoreDataframe:
+    """テーブル品質スコアのテスト"""
+
+    def test_empty_and_single_column_tables(self):
+        """空のテーブルと1列のテーブルのスコアをテスト"""
+        assert score_dataframe(pd.DataFrame()) == -1.0
+        assert score_dataframe(pd.DataFrame({'a': [1, 2]})) == -0.5
+
+    def test_empty_and_duplicate_columns_are_penalized(self):
+        """空列と重複列がスコアを下げることをテスト"""
+        clean = pd.DataFrame([['売上', '100', '200']] * 3, columns=['項目', '2024', '2025'])
+        messy = pd.DataFrame([['売上', '100', ' ']] * 3, columns=['項目', '2024', '2024'])
+        assert score_dataframe(clean) - score_dataframe(messy) == pytest.approx(2.0)
+
+class TestFixMergedColumns:
+    """結合された列の分割処理のテスト"""
+
+    def test_numeric_parts_are_split_into_columns(self):
+        """空白区切りの数値が別々の列に分割されることをテスト"""
+        df = pd.DataFrame([['売上', '100 200'], ['利益', '30 40']], columns=['項目', '実績 見込'])
+        result = fix_merged_columns(df)
+        assert list(result.columns) == ['項目', '実績', '見込']
+        assert result.values.tolist() == [['売上', '100', '200'], ['利益', '30', '40']]
+
+    def test_text_parts_are_not_split(self):
+        """数値でない空白区切りの値は分割されないことをテスト"""
+        df = pd.DataFrame([['東京 本社', '100'], ['大阪 支社', '200']], columns=['拠点', '金額'])
+        result = fix_merged_columns(df)
+        pd.testing.assert_frame_equal(result, df)
+
+class TestAnalyzeAndSplit:
+    """結合列の修正と後処理を組み合わせたテスト"""
+
+    def test_text_column_is_split_alongside_numeric_split(self):
+        """数値列が分割されても、複数語のテキスト列が分割されることをテスト"""
+        df = pd.DataFrame([['東京 本社', '100 200'], ['大阪 支社', '300 400']], columns=['拠点', '実績 見込'])
+        result = _analyze_and_split(df)
+        assert list(result.columns[2:]) == ['実績', '見込']
+        assert result.values.tolist() == [['東京', '本社', '100', '200'], ['大阪', '支社', '300', '400']]
+
+class TestDetectColumnStructure:
+    """列構造検出のテスト"""
+
+    def test_most_common_pattern_per_column(self):
+        """列ごとに最も多いパターンが選ばれることをテスト"""
+        df = pd.DataFrame({
+            '項目': ['売上', '利益', np.nan],
+            '金額': ['1,000 12.5%', '2,000 8%', 'A1 B'],
+        })
+        assert detect_column_structure(df) == [('TEXT',), ('NUM', 'PCT')]
+
+    def test_non_decimal_digits_are_numeric(self):
+        """丸数字や上付き数字がstr.isdigit()と同じく数字として扱われることをテスト"""
+        df = pd.DataFrame({'注記': ['① ②', '③ ④', '注² 参照']})
+        assert detect_column_structure(df) == [('NUM', 'NUM')]
+        df = pd.DataFrame({'注記': ['注² 参照', '注³ 参照']})
+        assert detect_column_structure(df) == [('MIXED', 'TEXT')]
+
+    def test_empty_column_has_no_pattern(self):
+        """空の列のパターンは空になることをテスト"""
+        df = pd.DataFrame({'a': [np.nan, ''], 'b': ['x', 'y']})
+        assert detect_column_structure(df) == [(), ('TEXT',)]
+
+class TestProcessTableWithNewlines:
+    """改行を含むセルの分割処理のテスト"""
+
+    def test_table_without_newlines_is_unchanged(self):
+        """改行を含まないテーブルはそのまま返されることをテスト"""
+        df = pd.DataFrame({'項目': ['売上', '利益'], '金額': [100, 20]})
+        result = process_table_with_newlines(df)
+        pd.testing.assert_frame_equal(result, df)
+
+    def test_newline_cells_are_split_into_rows(self):
+        """改行を含むセルが複数行に分割されることをテスト"""
+        df = pd.DataFrame({'項目': ['売上\r利益', '合計'], '備考': ['A', 'B']})
+        result = process_table_with_newlines(df)
+        assert result['項目'].tolist() == ['売上', '利益', '合計']
+        assert result['備考'].tolist() == ['A', '', 'B']
+
+    def test_uneven_splits_are_padded(self):
+        """分割数が異なるセルは空文字で埋められることをテスト"""
+        df = pd.DataFrame({'a': ['1\r2\r3'], 'b': ['x\ry'], 'c': [np.nan]})
+        result = process_table_with_newlines(df)
+        assert result['a'].tolist() == ['1', '2', '3']
+        assert result['b'].tolist() == ['x', 'y', '']
+        assert pd.isna(result['c'].iloc[0])
+        assert result['c'].iloc[1:].tolist() == ['', '']
+
+    def test_duplicate_column_names_are_kept(self):
+        """重複した列名が保持されることをテスト"""
+        df = pd.DataFrame([['a\rb', 'c']], columns=['実績', '実績'])
+        result = process_table_with_newlines(df)
+        assert list(result.columns) == ['実績', '実績']
+        assert result.values.tolist() == [['a', 'c'], ['b', '']]
+
+class TestConvertToNumeric:
+    """数値変換のテスト"""
+
+    def test_mostly_numeric_column_is_converted(self):
+        """カンマ区切りの数値が数値に変換され、非数値はそのまま残ることをテスト"""
+        df = pd.DataFrame({'項目': ['売上', '利益', '備考'], '金額': ['1,000', '2,500', 'なし']})
+        result = convert_to_numeric(df)
+        assert result['金額'].tolist() == [1000, 2500, 'なし']
+        assert result['項目'].tolist() == ['売上', '利益', '備考']
+
+    def test_mostly_text_column_is_kept(self):
+        """数値の割合が30%未満の列は変換されないことをテスト"""
+        df = pd.DataFrame({'備考': ['A', 'B', 'C', 'D', '1']})
+        result = convert_to_numeric(df)
+        assert result['備考'].tolist() == ['A', 'B', 'C', 'D', '1']
+
+class TestWriteCsvFile:
+    """CSV出力のテスト"""
+
+    def test_csv_has_bom_and_empty_nan_cells(self, tmp_path):
+        """BOM付きUTF-8で出力され、NaNが空欄になることをテスト"""
+        df = pd.DataFrame({'項目': ['売上', '利益'], '金額': ['1,000', np.nan]})
+        csv_path = tmp_path / 'table.csv'
+        write_csv_file(df, str(csv_path))
+        assert csv_path.read_bytes().startswith(b'\xef\xbb\xbf')
+        result = pd.read_csv(csv_path, encoding='utf-8-sig')
+        assert result['項目'].tolist() == ['売上', '利益']
+        assert result['金額'].iloc[0] == '1,000'
+        assert pd.isna(result['金額'].iloc[1])
+
+    def test_numeric_columns_are_not_quoted(self, tmp_path):
+        """数値列は引用符なしで出力されることをテスト"""
+        df = pd.DataFrame({'項目': ['売上', '利益'], '金額': [1, 2], '比率': [0.5, np.nan]})
+        csv_path = tmp_path / 'table.csv'
+        write_csv_file(df, str(csv_path))
+        lines = csv_path.read_text(encoding='utf-8-sig').splitlines()
+        assert lines[1] == '"売上",1,0.5'
+        assert lines[2] == '"利益",2,'